@@ -1,435 +1,1497 @@
+import argparse
+import asyncio
+import csv
 import neo4j
 import time
 import os
+import random
+import re
+import subprocess
+import tempfile
+import threading
 from dotenv import load_dotenv
 import json
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
+
+try:
+    import ijson
+except ImportError:  # streaming is optional; files are then loaded whole
+    ijson = None
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib json module is used instead
+    orjson = None
 
 # Load environment variables from the .env file
 load_dotenv()
 
+# Ingestion progress is logged once per committed group of batches; per-batch messages
+# are DEBUG only (run with --verbose)
+logger = logging.getLogger(__name__)
+
+# Number of rows sent to Neo4j per UNWIND batch (see "Tuning" in the README)
+BATCH_SIZE = int(os.getenv("NEO4J_BATCH_SIZE", "1000"))
+# Number of rows read ahead of the writers, and the most committed per transaction:
+# consecutive batches of a partition share one transaction, so the commit (and its
+# log flush) is paid once per group of batches, not per batch (see _partitioned_chunks)
+COMMIT_EVERY = int(os.getenv("NEO4J_COMMIT_EVERY", "10000"))
+# Maximum number of batch transactions in flight at once (writer threads, or async tasks)
+MAX_WORKERS = int(os.getenv("NEO4J_MAX_WORKERS", "8"))
+# With 0 nothing would be written (and --initial-load would commit "OF 0 ROWS")
+if min(BATCH_SIZE, COMMIT_EVERY, MAX_WORKERS) < 1:
+    raise ValueError("NEO4J_BATCH_SIZE, NEO4J_COMMIT_EVERY and NEO4J_MAX_WORKERS must be at least 1")
+# Set NEO4J_ASYNC_INGEST=1 to submit the batches concurrently with the async driver
+ASYNC_INGEST = os.getenv("NEO4J_ASYNC_INGEST", "0") == "1"
+
+# Set NEO4J_BULK_LOAD=1 (or pass --offline-bootstrap) to load the product catalog offline with
+# `neo4j-admin database import` when the target database does not exist yet; the online MERGE
+# path then handles the rest
+BULK_LOAD = os.getenv("NEO4J_BULK_LOAD", "0") == "1"
+NEO4J_ADMIN = os.getenv("NEO4J_ADMIN", "neo4j-admin")
+
+# Connection pool and retry settings shared by the sync and async drivers. The pool
+# must be at least as large as the number of concurrent batch transactions.
+DRIVER_CONFIG = {
+    "max_connection_pool_size": int(os.getenv("NEO4J_MAX_POOL_SIZE", "64")),
+    "connection_acquisition_timeout": float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "120")),
+    "connection_timeout": float(os.getenv("NEO4J_CONNECTION_TIMEOUT", "30")),
+    "max_transaction_retry_time": float(os.getenv("NEO4J_MAX_RETRY_TIME", "60")),
+    # Records pulled per round-trip by reading queries; the write sessions fetch all at once
+    "fetch_size": int(os.getenv("NEO4J_FETCH_SIZE", "1000")),
+    # TCP keep-alive, so idle pooled connections survive the gaps between stages
+    "keep_alive": True,
+}
+
+
+if orjson is not None:
+    def _json_dumps(value):
+        """Serializes a value to a JSON string (orjson returns bytes; Neo4j needs str)."""
+        return orjson.dumps(value).decode()
+
+    def _json_load(f):
+        """Parses a whole JSON file opened in binary mode."""
+        return orjson.loads(f.read())
+else:
+    _json_dumps = json.dumps
+    _json_load = json.load
+
+
+def _flatten(prefix, mapping):
+    """
+    Flattens a map of primitive values into `prefix_key` properties, since Neo4j
+    cannot store maps as properties, e.g. list_price -> list_price_amount/_currency.
+    """
+    return {f"{prefix}_{key}": value for key, value in (mapping or {}).items()}
+
+
+def _required(mapping, key):
+    """
+    Returns `mapping[key]`, raising KeyError for a null value as for a missing one:
+    a nested node cannot be MERGEd on a null key, so the document is skipped (see
+    _valid_rows) instead of failing the whole transaction.
+    """
+    value = mapping[key]
+    if value is None:
+        raise KeyError(key)
+    return value
+
+
+def _chunks(iterable, size):
+    """
+    Yields successive lists of at most `size` items from any iterable.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _partitioned_chunks(iterable, size, key, partitions):
+    """
+    Routes each item to one of `partitions` buffers by the hash of `key(item)` and
+    yields `(partition, chunk)` pairs. At most `size` items are buffered in all:
+    once that many are, the largest buffer is yielded, so a chunk holds between
+    `size / partitions` and `size` items and memory stays bounded by `size` items
+    however the keys are spread. Items sharing a key always land in the same
+    partition, and the writers run the chunks of a partition one after the other,
+    so such items (e.g. orders of one customer) are written in their input order
+    and never in concurrent transactions that contend for the same node locks.
+    """
+    buffers = [[] for _ in range(partitions)]
+    buffered = 0
+    for item in iterable:
+        buffers[hash(key(item)) % partitions].append(item)
+        buffered += 1
+        if buffered >= size:
+            partition = max(range(partitions), key=lambda p: len(buffers[p]))
+            chunk = buffers[partition]
+            buffers[partition] = []
+            buffered -= len(chunk)
+            yield partition, chunk
+    for partition, buffer in enumerate(buffers):
+        if buffer:
+            yield partition, buffer
+
+
+def _dedupe(iterable, keys, label, keep_last=False):
+    """
+    Drops items whose primary key (the first of `keys`) was already seen, so repeated
+    source rows do not cost another MERGE and its locks. Only the keys are
+    remembered, which keeps the input streamable; the first occurrence wins, which
+    suits the queries that set every property ON CREATE only (products and
+    variants). With `keep_last`, for queries that SET some properties on every
+    match (customers, inventory records and the line items of orders), repeated
+    items are kept so the last one wins (see _entity_batches). Items that are not objects or lack one of `keys`
+    cannot be written at all and are dropped too. The number of dropped items is
+    logged once at the end.
+    """
+    key = keys[0]
+    seen = set()
+    duplicates = 0
+    invalid = 0
+    for item in iterable:
+        if not isinstance(item, dict) or any(item.get(k) is None for k in keys):
+            invalid += 1
+            continue
+        if not keep_last:
+            item_key = item[key]
+            if item_key in seen:
+                duplicates += 1
+                continue
+            seen.add(item_key)
+        yield item
+    if duplicates:
+        logger.warning("Skipped %d duplicate %s by %s", duplicates, label, key)
+    if invalid:
+        logger.warning("Skipped %d %s without %s", invalid, label, " or ".join(keys))
+
+
+def iter_json_array(path):
+    """
+    Streams the items of a file holding a top-level JSON array one by one, so that
+    memory stays proportional to COMMIT_EVERY (the rows read ahead of the writers,
+    plus the groups in flight) rather than to the file size.
+    A missing file is reported immediately, but the file is only opened once the
+    first item is read, so streams that are never consumed hold no file handle.
+    """
+    os.stat(path)
+
+    def items():
+        with open(path, 'rb') as f:
+            if ijson is None:
+                yield from _json_load(f)
+            else:
+                # use_float keeps numbers as float; the Bolt driver cannot pack Decimal
+                yield from ijson.items(f, 'item', use_float=True)
+
+    return items()
+
 
 # --- Connection and Admin Functions ---
-def connect_to_neo4j(uri, user, password, database_name="system"):
+def _backoff_delay(attempt):
+    """
+    Exponential backoff used by the startup polls: 0.5 s, 1 s, 2 s, ... capped at 30 s,
+    plus up to 25% random jitter so that concurrent loaders do not poll in lockstep.
     """
-    Connects to a Neo4j database. By default, it connects to the "system" database,
-    which is required for administrative tasks like creating new databases.
+    delay = min(30, 0.5 * 2 ** attempt)
+    return delay + random.random() * 0.25 * delay
+
+
+def connect_to_neo4j(uri, user, password, max_retries=8):
+    """
+    Connects to a Neo4j server. The returned driver owns a connection pool and is
+    meant to be shared by the whole program; the target database is chosen per
+    session, e.g. "system" for administrative tasks like creating new databases.
+    The driver is built once; while the server is starting up, it is only pinged
+    again with exponential backoff. Query retries are left to the driver itself
+    (see max_transaction_retry_time in DRIVER_CONFIG).
     """
     try:
-        # Create a driver instance, specifying the target database
-        driver = neo4j.GraphDatabase.driver(uri, auth=(user, password), database=database_name)
-        # Verify the connection by checking if the driver is alive
-        driver.verify_connectivity()
-        print(f"Connection to Neo4j at {uri} on database '{database_name}' successful!")
-        return driver
+        # Create a driver instance; the database is selected on each session instead
+        driver = neo4j.GraphDatabase.driver(uri, auth=(user, password), **DRIVER_CONFIG)
     except Exception as e:
         print(f"An error occurred: {e}")
         return None
 
+    for attempt in range(max_retries):
+        try:
+            driver.execute_query("CALL db.ping()", database_="system", routing_=neo4j.RoutingControl.READ)
+            print(f"Connection to Neo4j at {uri} successful!")
+            return driver
+        except Exception as e:
+            delay = _backoff_delay(attempt)
+            print(f"An error occurred: {e}. Retrying in {delay:.1f} seconds... (Attempt {attempt + 1}/{max_retries})")
+            time.sleep(delay)
+
+    driver.close()
+    return None
+
 
 def create_database(driver, new_db_name):
     """
-    Creates a new database using an administrative session on the system database.
+    Creates a new database with an administrative query on the system database.
+    """
+    try:
+        # Bind the name as a parameter: handles dashes safely and keeps one cached plan
+        driver.execute_query("CREATE DATABASE $name IF NOT EXISTS", name=new_db_name, database_="system")
+        print(f"Successfully created database '{new_db_name}'.")
+    except Exception as e:
+        print(f"An error occurred during database creation: {e}")
+
+
+def database_exists(driver, database_name):
+    """
+    Returns True if the system database knows about the given database.
     """
-    with driver.session() as session:
+    records, _, _ = driver.execute_query(
+        "SHOW DATABASES YIELD name WHERE name = $name RETURN name",
+        name=database_name,
+        database_="system",
+        routing_=neo4j.RoutingControl.READ
+    )
+    return bool(records)
+
+
+def wait_for_database(driver, database_name, max_retries=8):
+    """
+    Waits until the given database reports itself "online" in the system database.
+    Polls with exponential backoff (see _backoff_delay), so a database that comes
+    up quickly is picked up without a fixed 5 second wait.
+    """
+    for attempt in range(max_retries):
+        print(f"Checking status of '{database_name}' database... (Attempt {attempt + 1}/{max_retries})")
         try:
-            # Use backticks to safely handle database names with special characters like dashes
-            session.run(f"CREATE DATABASE `{new_db_name}` IF NOT EXISTS")
-            print(f"Successfully created database '{new_db_name}'.")
+            records, _, _ = driver.execute_query(
+                "SHOW DATABASES YIELD name, currentStatus "
+                "WHERE name = $name RETURN currentStatus",
+                name=database_name,
+                database_="system",
+                routing_=neo4j.RoutingControl.READ
+            )
+            record = records[0] if records else None
+            if record and record["currentStatus"] == "online":
+                print(f"Database '{database_name}' is ready.")
+                return True
+            status = record["currentStatus"] if record else "missing"
+            print(f"Database '{database_name}' is not online yet (status: {status}).")
         except Exception as e:
-            print(f"An error occurred during database creation: {e}")
+            print(f"Connection failed: {e}. The database may not be ready yet.")
+        delay = _backoff_delay(attempt)
+        print(f"Retrying in {delay:.1f} seconds...")
+        time.sleep(delay)
+    return False
+
+
+# (label, property) pairs used as identity keys by the MERGE/MATCH clauses below
+IDENTITY_KEYS = [
+    ("Product", "product_id"),
+    ("Category", "category_id"),
+    ("Collection", "collection_id"),
+    ("Partner", "partner_id"),
+    ("Brand", "brand_id"),
+    ("Variant", "variant_id"),
+    ("Order", "order_id"),
+    ("Customers", "customer_id"),
+    ("SalesChannel", "channel_id"),
+    ("Shipment", "shipment_id"),
+    ("Inventory", "inventory_id"),
+    ("Address", "address_id"),
+    ("PaymentMethod", "payment_method_id"),
+]
+
+
+# --- Batch Queries ---
+def _compact_query(query):
+    """
+    Strips the `//` comments and collapses the whitespace of a Cypher query once at
+    import time, so every batch sends the same short string over Bolt and hits the
+    server's query plan cache, which is keyed by the exact query text.
+    """
+    return " ".join(re.sub(r"//[^\n]*", "", query).split())
+
+
+def _product_row(product):
+    """
+    Converts a raw product document into the row expected by PRODUCTS_BATCH_QUERY:
+    the identity key, a `props` map of scalar properties and the ids of the related
+    entities. Flat price/stock/dimension maps become native properties so they can
+    be queried and indexed; the remaining nested blobs are serialized to JSON here,
+    once, before the transaction starts.
+    """
+    _dumps = _json_dumps
+    return {
+        "product_id": product["product_id"],
+        "props": {
+            "sku": product.get("sku"),
+            "name": product.get("name"),
+            "short_description": product.get("short_description"),
+            "description": product.get("description"),
+            **_flatten("list_price", product.get("list_price")),
+            **_flatten("aggregate_stock", product.get("aggregate_stock")),
+            **_flatten("physical_attributes", product.get("physical_attributes")),
+            "status": product.get("status"),
+            "deleted": product.get("deleted"),
+            "created_at": product.get("created_at"),
+            "marketing": _dumps(product.get("marketing") or {}),
+            "tags": product.get("tags") or [],
+            "media": _dumps(product.get("media") or []),
+            "compliances": _dumps(product.get("compliances") or []),
+            "handling_instructions": _dumps(product.get("handling_instructions") or []),
+            "external_identifiers": _dumps(product.get("external_identifiers") or [])
+        },
+        "category_ids": [_required(category, "category_id") for category in product.get("categories") or []],
+        "collection_ids": [
+            _required(collection, "collection_id") for collection in product.get("collections") or []
+        ],
+        "partner_ids": [_required(partner, "partner_id") for partner in product.get("partners") or []],
+        "brand_id": (product.get("brand") or {}).get("id")
+    }
+
+
+def _valid_rows(to_row, items, label, id_key):
+    """
+    Converts raw documents with `to_row` and yields `(item, row)` pairs. Optional
+    fields default to empty values in the row functions; a document missing a key
+    they require (an id, or an id of a nested entity), or holding null for it, is
+    dropped and logged for the post-run audit instead of failing the whole batch
+    transaction.
+    """
+    for item in items:
+        try:
+            yield item, to_row(item)
+        except (KeyError, TypeError, AttributeError) as e:
+            item_id = item.get(id_key) if isinstance(item, dict) else None
+            logger.warning("Skipped malformed row of %s %s: %s %s", label, item_id, type(e).__name__, e)
+
+
+def _prepare_products_batch(products, label="products", id_key="product_id"):
+    """
+    Prepares a batch of raw products. Categories, collections, partners and brands
+    are shared by many products, so they are de-duplicated here and MERGEd once per
+    batch by PRODUCT_DIMENSIONS_QUERY; the product rows only carry their ids.
+    The first occurrence of an entity wins, matching the ON CREATE SET semantics.
+    """
+    categories, collections, partners, brands = {}, {}, {}, {}
+    rows = []
+    for product, row in _valid_rows(_product_row, products, label, id_key):
+        rows.append(row)
+        for category in product.get("categories") or []:
+            categories.setdefault(category["category_id"], category)
+        for collection in product.get("collections") or []:
+            collections.setdefault(collection["collection_id"], collection)
+        for partner in product.get("partners") or []:
+            partners.setdefault(partner["partner_id"], partner)
+        brand = product.get("brand") or {}
+        if brand.get("id") is not None:
+            brands.setdefault(brand["id"], brand)
+    return {
+        "rows": rows,
+        "categories": list(categories.values()),
+        "collections": list(collections.values()),
+        "partners": list(partners.values()),
+        "brands": list(brands.values())
+    }
+
+
+PRODUCT_DIMENSIONS_QUERY = _compact_query("""
+    // MERGE each distinct Category, Collection, Partner and Brand of the batch once
+    FOREACH (category IN $categories |
+        MERGE (c:Category {category_id: category.category_id})
+        ON CREATE SET c.name = category.name, c.slug = category.slug
+    )
+    FOREACH (collection IN $collections |
+        MERGE (coll:Collection {collection_id: collection.collection_id})
+        ON CREATE SET coll.name = collection.name, coll.slug = collection.slug
+    )
+    FOREACH (partner IN $partners |
+        MERGE (pa:Partner {partner_id: partner.partner_id})
+        ON CREATE SET pa.name = partner.name, pa.type = partner.type
+    )
+    FOREACH (brand IN $brands |
+        MERGE (b:Brand {brand_id: brand.id})
+        ON CREATE SET b.name = brand.name
+    )
+""")
+
+
+PRODUCTS_BATCH_QUERY = _compact_query("""
+    // MERGE every Product node of the batch first, as it is the central point
+    UNWIND $rows AS row
+    MERGE (p:Product {product_id: row.product_id})
+    ON CREATE SET p += row.props
+
+    // The related nodes already exist (see PRODUCT_DIMENSIONS_QUERY), so only the
+    // relationships are created here. Each unit subquery leaves the row count intact,
+    // so every Product is resolved once per row
+
+    // Link Categories to the Product
+    WITH p, row
+    CALL {
+        WITH p, row
+        UNWIND row.category_ids AS category_id
+        MATCH (c:Category {category_id: category_id})
+        MERGE (p)-[:BELONGS_TO]->(c)
+    }
+
+    // Link Collections
+    CALL {
+        WITH p, row
+        UNWIND row.collection_ids AS collection_id
+        MATCH (coll:Collection {collection_id: collection_id})
+        MERGE (p)-[:PART_OF]->(coll)
+    }
+
+    // Link Partners
+    CALL {
+        WITH p, row
+        UNWIND row.partner_ids AS partner_id
+        MATCH (pa:Partner {partner_id: partner_id})
+        MERGE (p)-[:SUPPLIED_BY]->(pa)
+    }
+
+    // Link the Brand
+    CALL {
+        WITH p, row
+        MATCH (b:Brand {brand_id: row.brand_id})
+        MERGE (p)-[:BELONGS_TO]->(b)
+    }
+""")
+
+
+def _variant_row(variant):
+    """
+    Converts a raw variant document into the row expected by VARIANTS_BATCH_QUERY.
+    The price and dimension maps are flattened like in _product_row.
+    """
+    _dumps = _json_dumps
+    return {
+        "variant_id": variant["variant_id"],
+        "product_id": variant["product_id"],
+        "props": {
+            "sku": variant.get("sku"),
+            "name": variant.get("name"),
+            "status": variant.get("status"),
+            "deleted": variant.get("deleted"),
+            "variation_type": variant.get("variation_type"),
+            "created_at": variant.get("created_at"),
+            "updated_at": variant.get("updated_at"),
+            **_flatten("list_price", variant.get("list_price")),
+            "variations": _dumps(variant.get("variations") or {}),
+            **_flatten("physical_attributes", variant.get("physical_attributes")),
+            "media": _dumps(variant.get("media") or []),
+            "inventory_summary": _dumps(variant.get("inventory_summary") or []),
+            "sales_channels": _dumps(variant.get("sales_channels") or []),
+            "external_identifiers": _dumps(variant.get("external_identifiers") or [])
+        }
+    }
+
+
+VARIANTS_BATCH_QUERY = _compact_query("""
+    // MERGE every Variant node of the batch
+    UNWIND $rows AS row
+    MERGE (v:Variant {variant_id: row.variant_id})
+    ON CREATE SET v += row.props
+
+    // MATCH the existing Product node and MERGE the relationship
+    WITH v, row
+    MATCH (p:Product {product_id: row.product_id})
+    MERGE (p)-[:HAS]->(v)
+""")
+
+
+def _order_row(order):
+    """
+    Converts a raw order document into the row expected by ORDERS_BATCH_QUERY.
+    The totals and shipment addresses are flattened into native properties, the
+    payments and promotions (lists of maps) serialized to JSON strings, and the
+    line items reduced to the fields the query actually uses.
+    """
+    _dumps = _json_dumps
+    sales_channel = order.get("sales_channel") or {}
+    return {
+        "order_id": order["order_id"],
+        "props": {
+            "order_number": order.get("order_number"),
+            "status": order.get("status"),
+            "currency": order.get("currency"),
+            "notes": order.get("notes", ""),
+            "created_at": order.get("created_at"),
+            "updated_at": order.get("updated_at"),
+            "order_created_date": order.get("order_created_date"),
+            **_flatten("totals", order.get("totals")),
+            "payments": _dumps(order.get("payments") or []),
+            "applied_promotions": _dumps(order.get("applied_promotions") or []),
+            "external_references": _dumps(order.get("external_references") or [])
+        },
+        "customer_id": order["customer_id"],
+        "sales_channel": {
+            "channel_id": sales_channel.get("channel_id"),
+            "props": {
+                "name": sales_channel.get("name"),
+                "type": sales_channel.get("type"),
+                "status": sales_channel.get("status")
+            }
+        },
+        "shipments": [
+            {
+                "shipment_id": _required(shipment, "shipment_id"),
+                "props": {
+                    "status": shipment.get("status"),
+                    "carrier": shipment.get("carrier"),
+                    "tracking_number": shipment.get("tracking_number"),
+                    "shipped_date": shipment.get("shipped_date"),
+                    "estimated_delivery_date": shipment.get("estimated_delivery_date"),
+                    **_flatten("shipping_address", shipment.get("shipping_address"))
+                },
+                "items": [
+                    {"variant_id": item["variant_id"], "quantity": item.get("quantity")}
+                    for item in shipment.get("items") or []
+                ]
+            }
+            for shipment in order.get("shipments") or []
+        ],
+        "order_items": [
+            {
+                "variant_id": item["variant_id"],
+                "quantity": item.get("quantity"),
+                "line_item_total": item.get("line_item_total")
+            }
+            for item in order.get("order_items") or []
+        ]
+    }
+
+
+ORDERS_BATCH_QUERY = _compact_query("""
+    // MERGE every Order node of the batch first, as it is the central point
+    UNWIND $rows AS row
+    MERGE (o:Order {order_id: row.order_id})
+    ON CREATE SET o += row.props
+
+    // Link the Customer, which is ingested before the orders. MATCH rather than
+    // MERGE never creates a bare Customers node, and the unit subquery keeps the
+    // row alive when the customer is unknown (see UNKNOWN_CUSTOMERS_QUERY)
+    WITH o, row
+    CALL {
+        WITH o, row
+        MATCH (c:Customers {customer_id: row.customer_id})
+        MERGE (c)-[:PLACED]->(o)
+    }
+
+    // Handle Sales Channel (now also representing the BusinessEntity)
+    FOREACH (sales_channel IN CASE WHEN row.sales_channel.channel_id IS NOT NULL THEN [row.sales_channel] ELSE [] END |
+        MERGE (salesChannel:SalesChannel {channel_id: sales_channel.channel_id})
+        ON CREATE SET salesChannel += sales_channel.props
+        MERGE (o)-[:PLACED_ON_CHANNEL]->(salesChannel)
+    )
+
+    // Handle Shipments and link their items to the already ingested Variants
+    // (items of unknown variants are reported by UNKNOWN_VARIANTS_QUERY).
+    // Like the other list blocks, this is a unit subquery so an empty list does
+    // not drop the row
+    CALL {
+        WITH o, row
+        UNWIND row.shipments AS shipment
+        MERGE (s:Shipment {shipment_id: shipment.shipment_id})
+        ON CREATE SET s += shipment.props
+        MERGE (o)-[:HAS_SHIPMENT]->(s)
+        WITH s, shipment
+        UNWIND shipment.items AS item
+        MATCH (v:Variant {variant_id: item.variant_id})
+        MERGE (s)-[r:CONTAINS]->(v)
+        ON CREATE SET
+            r.quantity = item.quantity
+    }
+
+    // Handle Order Items (Variants) - this is for all items on the order, not just shipments
+    CALL {
+        WITH o, row
+        UNWIND row.order_items AS item
+        MATCH (v_order:Variant {variant_id: item.variant_id})
+        MERGE (o)-[ro:CONTAINS]->(v_order)
+        SET
+            ro.quantity = item.quantity,
+            ro.line_item_total = item.line_item_total
+    }
+""")
+
+
+def _inventory_row(inventory):
+    """
+    Converts a raw inventory record into the row expected by INVENTORIES_BATCH_QUERY.
+    """
+    quantity = inventory.get("quantity") or {}
+    return {
+        "inventory_id": inventory["inventory_id"],
+        "variant_id": inventory["variant_id"],
+        "props": {
+            "created_at": inventory.get("created_at"),
+            "updated_at": inventory.get("updated_at")
+        },
+        "stock": {
+            "total": quantity.get("total"),
+            "sellable": quantity.get("sellable"),
+            "reserved": quantity.get("reserved")
+        }
+    }
+
+
+INVENTORIES_BATCH_QUERY = _compact_query("""
+    // MATCH the Variant node that each inventory record is for; records of unknown
+    // variants are skipped and reported by UNKNOWN_VARIANTS_QUERY
+    UNWIND $rows AS row
+    MATCH (v:Variant {variant_id: row.variant_id})
+
+    // MERGE the Inventory node, creating it if it doesn't exist
+    MERGE (inv:Inventory {inventory_id: row.inventory_id})
+    ON CREATE SET inv += row.props
+
+    // MERGE the relationship and add properties to it
+    MERGE (inv)-[r:RECORDS_STOCK_FOR]->(v)
+    SET r += row.stock
+""")
+
+
+def _customer_row(customer):
+    """
+    Converts a raw customer document into the row expected by CUSTOMERS_BATCH_QUERY.
+    Addresses and payment methods are split into their key, the relationship's
+    is_default flag and a `props` map. The personalization details and wishlist
+    prices are flattened into native properties; only the list of important
+    dates stays a JSON string.
+    """
+    _dumps = _json_dumps
+    personalization = customer.get("personalization_details") or {}
+    return {
+        "customer_id": customer["customer_id"],
+        "props": {
+            "email": customer.get("email"),
+            "first_name": customer.get("first_name"),
+            "last_name": customer.get("last_name"),
+            "phone": customer.get("phone"),
+            "customer_segment": customer.get("customer_segment"),
+            "marketing_consent": customer.get("marketing_consent"),
+            "notes": customer.get("notes"),
+            "status": customer.get("status"),
+            "deleted": customer.get("deleted"),
+            "created_at": customer.get("created_at"),
+            "updated_at": customer.get("updated_at"),
+            "personalization_gender": personalization.get("gender"),
+            "personalization_birth_date": personalization.get("birth_date"),
+            "personalization_important_dates": _dumps(personalization.get("important_dates") or [])
+        },
+        "addresses": [
+            {
+                "address_id": _required(address, "address_id"),
+                "is_default": address.get("is_default"),
+                "props": {
+                    "label": address.get("label"),
+                    "receiver_name": address.get("receiver_name"),
+                    "receiver_phone": address.get("receiver_phone"),
+                    "street": address.get("street"),
+                    "city": address.get("city"),
+                    "state": address.get("state"),
+                    "zip_code": address.get("zip_code"),
+                    "country": address.get("country")
+                }
+            }
+            for address in customer.get("addresses") or []
+        ],
+        "payment_methods": [
+            {
+                "payment_method_id": _required(method, "payment_method_id"),
+                "is_default": method.get("is_default"),
+                "props": {
+                    "type": method.get("type"),
+                    "gateway_token": method.get("gateway_token"),
+                    "card_last_four": method.get("card_last_four"),
+                    "card_brand": method.get("card_brand"),
+                    "card_expiry_month": method.get("card_expiry_month"),
+                    "card_expiry_year": method.get("card_expiry_year")
+                }
+            }
+            for method in customer.get("payment_methods") or []
+        ],
+        "wishlist": [
+            {
+                "variant_id": item["variant_id"],
+                "props": {
+                    "added_at": item.get("added_at"),
+                    **(_flatten("price_at_add", item["price_at_add"])
+                       if isinstance(item.get("price_at_add"), dict)
+                       else {"price_at_add": item.get("price_at_add")})
+                }
+            }
+            for item in customer.get("wishlist") or []
+        ]
+    }
+
+
+CUSTOMERS_BATCH_QUERY = _compact_query("""
+    // MERGE every Customers node of the batch first
+    UNWIND $rows AS row
+    MERGE (c:Customers {customer_id: row.customer_id})
+    SET c += row.props
+
+    // Handle Addresses. Each list block is a unit subquery so that a customer
+    // without addresses still gets its payment methods and wishlist
+    WITH c, row
+    CALL {
+        WITH c, row
+        UNWIND row.addresses AS address
+        MERGE (a:Address {address_id: address.address_id})
+        ON CREATE SET a += address.props
+        MERGE (c)-[rel:HAS_ADDRESS]->(a)
+        ON CREATE SET
+            rel.is_default = address.is_default
+    }
+
+    // Handle Payment Methods
+    CALL {
+        WITH c, row
+        UNWIND row.payment_methods AS method
+        MERGE (p:PaymentMethod {payment_method_id: method.payment_method_id})
+        ON CREATE SET p += method.props
+        MERGE (c)-[rel:HAS_PAYMENT_METHOD]->(p)
+        ON CREATE SET
+            rel.is_default = method.is_default
+    }
+
+    // Handle Wishlist Items, linking only Variants that were ingested (see
+    // UNKNOWN_VARIANTS_QUERY)
+    CALL {
+        WITH c, row
+        UNWIND row.wishlist AS item
+        MATCH (v:Variant {variant_id: item.variant_id})
+        MERGE (c)-[w:WISHES_FOR]->(v)
+        ON CREATE SET w += item.props
+    }
+""")
+
+def _unknown_ids_query(label, key):
+    """
+    Builds a query returning which of the given `$ids` no `label` node has. The
+    batch queries MATCH the nodes they link to, so a link to an unknown node is
+    skipped without an error; this query reports them for the post-run audit.
+    """
+    return _compact_query(f"""
+        UNWIND $ids AS id
+        OPTIONAL MATCH (n:{label} {{{key}: id}})
+        WITH id WHERE n IS NULL
+        RETURN collect(id) AS unknown
+    """)
+
+
+UNKNOWN_CUSTOMERS_QUERY = _unknown_ids_query("Customers", "customer_id")
+UNKNOWN_VARIANTS_QUERY = _unknown_ids_query("Variant", "variant_id")
+
+
+def _distinct(rows, key):
+    """Returns the distinct values of `key` in a batch of rows."""
+    return list({row[key] for row in rows})
+
+
+def _order_variant_ids(rows):
+    """Returns the distinct variant ids of the line items and shipment items of order rows."""
+    variant_ids = {item["variant_id"] for row in rows for item in row["order_items"]}
+    variant_ids.update(
+        item["variant_id"] for row in rows for shipment in row["shipments"] for item in shipment["items"]
+    )
+    return list(variant_ids)
+
+
+def _wishlist_variant_ids(rows):
+    """Returns the distinct variant ids of the wishlist items of customer rows."""
+    return list({item["variant_id"] for row in rows for item in row["wishlist"]})
+
+
+def _warn_unknown(label, target, record):
+    """Logs the ids returned by an _unknown_ids_query, whose links from `label` were skipped."""
+    unknown = record["unknown"]
+    if unknown:
+        logger.warning("Skipped links from %s to %d unknown %s: %s",
+                       label, len(unknown), target, ", ".join(str(key) for key in unknown))
+
+
+# Every batch query, compiled ahead of the load by Neo4jDataIngestor.warm_up_queries
+BATCH_QUERIES = (
+    PRODUCT_DIMENSIONS_QUERY,
+    PRODUCTS_BATCH_QUERY,
+    VARIANTS_BATCH_QUERY,
+    ORDERS_BATCH_QUERY,
+    INVENTORIES_BATCH_QUERY,
+    CUSTOMERS_BATCH_QUERY,
+    UNKNOWN_CUSTOMERS_QUERY,
+    UNKNOWN_VARIANTS_QUERY,
+)
 
 
 # --- Data Ingestion Logic ---
+def _entity_batches(data, prepare, label, keys, partition_key, batch_size, partitions, keep_last=False):
+    """
+    Yields `(partition, group)` pairs, each group being a list of `(size,
+    (prepared,))` batches meant to be committed in one transaction. Documents
+    without one of `keys` and duplicates by the first of them are dropped (see
+    _dedupe), the rest are partitioned by `partition_key(document)` into chunks of
+    at most COMMIT_EVERY documents (see _partitioned_chunks), and each chunk is
+    split into batches of `batch_size` converted with `prepare` as they are read.
+    With `keep_last`, duplicates within a chunk are collapsed into their last
+    occurrence instead; duplicates in later chunks of the same partition are
+    committed after it, so the last one still wins.
+    """
+    id_key = keys[0]
+    merged = 0
+    chunks = _partitioned_chunks(_dedupe(data, keys, label, keep_last), COMMIT_EVERY, partition_key, partitions)
+    for partition, chunk in chunks:
+        if keep_last:
+            last = {item[id_key]: item for item in chunk}
+            merged += len(chunk) - len(last)
+            chunk = list(last.values())
+        group = []
+        for batch in _chunks(chunk, batch_size):
+            prepared = prepare(batch, label, id_key)
+            # Products are prepared into a dict of rows and related nodes, the rest into rows
+            rows = prepared["rows"] if isinstance(prepared, dict) else prepared
+            if rows:
+                group.append((len(rows), (prepared,)))
+        if group:
+            yield partition, group
+    if merged:
+        logger.warning("Merged %d duplicate %s by %s into their last occurrence", merged, label, id_key)
+
+
+def _rows(to_row):
+    """Adapts a per-document row function to a whole batch, dropping malformed documents."""
+    return lambda batch, label, id_key: [row for _, row in _valid_rows(to_row, batch, label, id_key)]
+
+
+def _product_brand_id(product):
+    """Returns the id of a raw product's brand, or None."""
+    brand = product.get("brand")
+    return brand.get("id") if isinstance(brand, dict) else None
+
+
+def _ingestion_stages(product_data, variants_data, orders_data, customers_data, inventories_data,
+                      batch_size, partitions):
+    """
+    Describes the ingestion as `(label, dependencies, tx function name, batches)`
+    stages, shared by the sync and async ingestors. Each stage lists the stages
+    whose nodes it MATCHes: variants need their products; inventory records,
+    wishlists and orders their variants; orders their customers. Independent stages
+    (inventory records and customers, then inventory records and orders) can be
+    written at the same time. Within a stage, rows are partitioned by the node most
+    of them contend for: the brand of a product, the parent product of a variant,
+    the stocked variant or the ordering customer. Customers are partitioned by
+    their own id, which only keeps repeated rows of a customer in order. Other
+    shared nodes (categories, addresses, ...) can still be locked by concurrent
+    transactions; execute_write retries those on deadlock.
+    """
+    def batches(data, prepare, label, keys, partition_key, keep_last=False):
+        return _entity_batches(data, prepare, label, keys, partition_key, batch_size, partitions, keep_last)
+
+    return (
+        ("products", (), "_ingest_products_batch",
+         batches(product_data, _prepare_products_batch, "products", ("product_id",), _product_brand_id)),
+        ("variants", ("products",), "_ingest_variants_batch",
+         batches(variants_data, _rows(_variant_row), "variants", ("variant_id", "product_id"),
+                 itemgetter("product_id"))),
+        ("inventory records", ("variants",), "_ingest_inventories_batch",
+         batches(inventories_data, _rows(_inventory_row), "inventory records", ("inventory_id", "variant_id"),
+                 itemgetter("variant_id"), keep_last=True)),
+        ("customers", ("variants",), "_ingest_customers_batch",
+         batches(customers_data, _rows(_customer_row), "customers", ("customer_id",),
+                 itemgetter("customer_id"), keep_last=True)),
+        ("orders", ("variants", "customers"), "_ingest_orders_batch",
+         batches(orders_data, _rows(_order_row), "orders", ("order_id", "customer_id"),
+                 itemgetter("customer_id"), keep_last=True)),
+    )
+
+
+@lru_cache(maxsize=None)
+def _in_transactions_query(query):
+    """
+    Rewrites an `UNWIND $rows AS row ...` batch query into a single statement that
+    the server commits by itself every BATCH_SIZE rows. Other queries are unchanged.
+    """
+    unwind = "UNWIND $rows AS row "
+    if not query.startswith(unwind):
+        return query
+    return f"{unwind}CALL {{ WITH row {query[len(unwind):]} }} IN TRANSACTIONS OF {BATCH_SIZE} ROWS"
+
+
+class _InTransactionsRunner:
+    """
+    Stands in for the managed transaction in initial-load mode: each batch query is
+    sent as an auto-commit `CALL { ... } IN TRANSACTIONS` statement on the session,
+    which is the only place such statements are allowed to run.
+    """
+    def __init__(self, session):
+        self.session = session
+
+    def run(self, query, **parameters):
+        return self.session.run(_in_transactions_query(query), **parameters)
+
+
+def _raise_group_errors(label, errors):
+    """
+    Logs every error of a stage's groups (None for a group that succeeded) and
+    raises the first one. Shared by the sync and async writers.
+    """
+    errors = [error for error in errors if error is not None]
+    for error in errors:
+        logger.error("An error occurred during %s ingestion: %s", label, error)
+    if errors:
+        raise errors[0]
+
+
 class Neo4jDataIngestor:
-    def __init__(self, driver, database_name):
+    def __init__(self, driver, database_name, max_workers=MAX_WORKERS, initial_load=False):
+        """
+        With `initial_load`, meant for the first import into an empty database, each
+        statement carries COMMIT_EVERY rows and the server commits them in windows of
+        BATCH_SIZE rows with `CALL { ... } IN TRANSACTIONS`. Such statements are not
+        retried, so they are sent by a single writer that cannot deadlock with
+        another, and incremental ingests should keep the default managed transactions.
+        """
         self.driver = driver
         self.database_name = database_name
+        self.max_workers = 1 if initial_load else max_workers
+        self.initial_load = initial_load
+        self.batch_size = COMMIT_EVERY if initial_load else BATCH_SIZE
+
+    def ensure_schema(self):
+        """
+        Creates a uniqueness constraint on every identity key used by MERGE. Each
+        constraint is backed by an index, so lookups are index seeks instead of full
+        label scans, and the planner knows at most one node can match. Safe to run on
+        every start.
+        """
+        with self.driver.session(database=self.database_name) as session:
+            for label, prop in IDENTITY_KEYS:
+                session.run(
+                    f"CREATE CONSTRAINT {label.lower()}_{prop}_unique IF NOT EXISTS "
+                    f"FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE"
+                ).consume()
+        logger.info("Ensured %d uniqueness constraints on database '%s'", len(IDENTITY_KEYS), self.database_name)
+
+    def warm_up_queries(self):
+        """
+        Compiles every batch query with EXPLAIN before the load starts, so that the
+        first batches of each stage already find their plan in the server's query
+        cache instead of all planning the same query concurrently.
+        """
+        with self.driver.session(database=self.database_name) as session:
+            for query in BATCH_QUERIES:
+                if self.initial_load:
+                    query = _in_transactions_query(query)
+                session.run(
+                    f"EXPLAIN {query}",
+                    rows=[], categories=[], collections=[], partners=[], brands=[], ids=[]
+                ).consume()
 
     def ingest_data(self, product_data, variants_data, orders_data, customers_data, inventories_data):
         """Main method to ingest all data"""
-        with self.driver.session(database=self.database_name) as session:
-            for product in product_data:
-                session.execute_write(self._ingest_product, product)
+        # Constraints must exist before the MERGEs run, otherwise every lookup is a label scan
+        self.ensure_schema()
+        self.warm_up_queries()
+
+        stages = _ingestion_stages(
+            product_data, variants_data, orders_data, customers_data, inventories_data,
+            self.batch_size, self.max_workers
+        )
 
-            for variant in variants_data:
-                session.execute_write(self._ingest_variant, variant)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor, \
+                ThreadPoolExecutor(max_workers=len(stages)) as scheduler:
+            finished = {}
 
-            for order in orders_data:
-                session.execute_write(self._ingest_order, order)
+            def run_stage(label, dependencies, tx_name, groups):
+                for dependency in dependencies:
+                    # Re-raises the error of a failed dependency, skipping this stage
+                    finished[dependency].result()
+                self._write_groups(executor, label, getattr(self, tx_name), groups)
+
+            # Stages are submitted in dependency order, so every dependency already
+            # has a future by the time a stage waits for it
+            for label, dependencies, tx_name, groups in stages:
+                finished[label] = scheduler.submit(run_stage, label, dependencies, tx_name, groups)
+            for future in finished.values():
+                future.result()
+
+    def _write_groups(self, executor, label, tx_function, groups):
+        """
+        Writes `(partition, group)` pairs (see _entity_batches) concurrently on the
+        executor's threads, calling `tx_function(tx, *args)` for each batch of a
+        group. All batches of a group share one managed transaction; execute_write
+        retries the whole group on transient errors such as deadlocks. At most one
+        group per partition is in flight, and the groups of a partition are
+        committed in order (see _partitioned_chunks). Each group gets its own
+        session, since sessions must not be shared between threads while the driver
+        and its connection pool can be. The call returns only once every group of
+        the entity type is committed. Once a group has failed, no further groups are
+        read or submitted and the ones not started yet are cancelled; the failures
+        are logged and the first one is raised (see _raise_group_errors). In
+        initial-load mode each batch is instead run as auto-commit statements (see
+        _InTransactionsRunner).
+        """
 
-            for inventory in inventories_data:
-                session.execute_write(self._ingest_inventory, inventory)
+        def write_group(tx, group):
+            for size, args in group:
+                logger.debug("Writing batch of %d %s", size, label)
+                tx_function(tx, *args)
 
-            for customer in customers_data:
-                session.execute_write(self._ingest_customers, customer)
+        total = 0
+        progress = threading.Lock()
+        failed = threading.Event()
+        in_flight = {}
+
+        def write(group):
+            nonlocal total
+            try:
+                # The batch queries return at most one record, so there is nothing to fetch lazily
+                with self.driver.session(database=self.database_name, fetch_size=-1) as session:
+                    if self.initial_load:
+                        write_group(_InTransactionsRunner(session), group)
+                    else:
+                        session.execute_write(write_group, group)
+            except Exception:
+                failed.set()
+                raise
+            size = sum(size for size, _ in group)
+            with progress:
+                total += size
+                logger.info("Ingested %d %s (total %d)", size, label, total)
+
+        try:
+            for partition, group in groups:
+                # Waiting for the partition's previous group keeps its rows in order
+                if partition in in_flight:
+                    wait([in_flight[partition]])
+                if failed.is_set():
+                    break
+                in_flight[partition] = executor.submit(write, group)
+        finally:
+            if failed.is_set():
+                # Groups that have not started yet are dropped; running ones finish
+                for future in in_flight.values():
+                    future.cancel()
+            wait(list(in_flight.values()))
+        _raise_group_errors(label, [
+            future.exception() for future in in_flight.values() if not future.cancelled()
+        ])
 
     @staticmethod
-    def _ingest_product(tx, product):
+    def _ingest_products_batch(tx, batch):
         """
-        Ingests a single product, creating the product node and all its
-        associated relationships in a single, optimized Cypher query.
+        Ingests a prepared batch of products: first the distinct related nodes, then
+        the product nodes and their relationships with a single UNWIND-driven query.
+        Like the other batch functions, it consumes each result right away, which
+        discards the (empty) record stream and only keeps the summary.
         """
-        tx.run("""
-            // MERGE the Product node first, as it is the central point
-            MERGE (p:Product {product_id: $product_id})
-            ON CREATE SET
-                p.sku = $sku,
-                p.name = $name,
-                p.short_description = $short_description,
-                p.description = $description,
-                p.list_price = toString($list_price),
-                p.aggregate_stock = toString($aggregate_stock),
-                p.physical_attributes = toString($physical_attributes),
-                p.status = $status,
-                p.deleted = $deleted,
-                p.created_at = $created_at,
-                p.marketing = toString($marketing),
-                p.tags = $tags,
-                p.media = toString($media),
-                p.compliances = toString($compliances),
-                p.handling_instructions = toString($handling_instructions),
-                p.external_identifiers = toString($external_identifiers)
-
-            // Handle Categories: MERGE a Category node and link it to the Product
-            WITH p, $categories AS categories
-            UNWIND categories AS category
-            MERGE (c:Category {category_id: category.category_id})
-            ON CREATE SET c.name = category.name, c.slug = category.slug
-            MERGE (p)-[:BELONGS_TO]->(c)
-
-            // Handle Collections: MERGE a Collection node and link it
-            WITH p, $collections AS collections
-            UNWIND collections AS collection
-            MERGE (coll:Collection {collection_id: collection.collection_id})
-            ON CREATE SET coll.name = collection.name, coll.slug = collection.slug
-            MERGE (p)-[:PART_OF]->(coll)
-
-            // Handle Partners: MERGE a Partner node and link it
-            WITH p, $partners AS partners
-            UNWIND partners AS partner
-            MERGE (pa:Partner {partner_id: partner.partner_id})
-            ON CREATE SET pa.name = partner.name, pa.type = partner.type
-            MERGE (p)-[:SUPPLIED_BY]->(pa)
-
-            // Handle Brand: MERGE a Brand node and link it
-            WITH p, $brand AS brand
-            MERGE (b:Brand {brand_id: brand.id})
-            ON CREATE SET b.name = brand.name
-            MERGE (p)-[:BELONGS_TO]->(b)
-        """,
-               product_id=product["product_id"],
-               sku=product["sku"],
-               name=product["name"],
-               short_description=product["short_description"],
-               description=product["description"],
-               list_price=json.dumps(product["list_price"]),
-               aggregate_stock=json.dumps(product["aggregate_stock"]),
-               physical_attributes=json.dumps(product["physical_attributes"]),
-               status=product["status"],
-               deleted=product["deleted"],
-               created_at=product["created_at"],
-               marketing=json.dumps(product["marketing"]),
-               tags=product["tags"],
-               media=json.dumps(product["media"]),
-               compliances=json.dumps(product["compliances"]),
-               handling_instructions=json.dumps(product["handling_instructions"]),
-               external_identifiers=json.dumps(product["external_identifiers"]),
-               categories=product["categories"],
-               collections=product["collections"],
-               partners=product["partners"],
-               brand=product["brand"]
-               )
-        print(f"Successfully ingested product: {product['name']}")
+        tx.run(
+            PRODUCT_DIMENSIONS_QUERY,
+            categories=batch["categories"],
+            collections=batch["collections"],
+            partners=batch["partners"],
+            brands=batch["brands"]
+        ).consume()
+        tx.run(PRODUCTS_BATCH_QUERY, rows=batch["rows"]).consume()
 
     @staticmethod
-    def _ingest_variant(tx, variant):
+    def _ingest_variants_batch(tx, rows):
         """
-        Ingests a single variant, creating the variant node and its
-        relationship to the Product node in a single, optimized Cypher query.
+        Ingests a batch of prepared variant rows and links each to its Product.
         """
-        tx.run(""" 
-               // MERGE the Variant node
-               MERGE (v:Variant {variant_id: $variant_id})
-               ON CREATE SET
-                   v.sku = $sku,
-                   v.name = $name,
-                   v.status = $status,
-                   v.deleted = $deleted,
-                   v.variation_type = $variation_type,
-                   v.created_at = $created_at,
-                   v.updated_at = $updated_at,
-                   v.list_price = toString($list_price),
-                   v.variations = toString($variations),
-                   v.physical_attributes = toString($physical_attributes),
-                   v.media = toString($media),
-                   v.inventory_summary = toString($inventory_summary),
-                   v.sales_channels = toString($sales_channels),
-                   v.external_identifiers = toString($external_identifiers)
-
-               // MATCH the existing Product node
-               WITH v, $product_id AS product_id
-               MATCH (p:Product {product_id: product_id})
-
-               // MERGE the relationship
-               MERGE (p)-[:HAS]->(v)
-               """,
-               variant_id=variant["variant_id"],
-               sku=variant["sku"],
-               name=variant["name"],
-               status=variant["status"],
-               deleted=variant["deleted"],
-               variation_type=variant["variation_type"],
-               created_at=variant["created_at"],
-               updated_at=variant["updated_at"],
-               list_price=json.dumps(variant.get("list_price", {})),
-               variations=json.dumps(variant.get("variations", {})),
-               physical_attributes=json.dumps(variant.get("physical_attributes", {})),
-               media=json.dumps(variant.get("media", [])),
-               inventory_summary=json.dumps(variant.get("inventory_summary", [])),
-               sales_channels=json.dumps(variant.get("sales_channels", [])),
-               external_identifiers=json.dumps(variant.get("external_identifiers", [])),
-               product_id=variant["product_id"]  # Pass product_id for relationship
-               )
-        print(f"Successfully ingested variant: {variant['name']}")
+        tx.run(VARIANTS_BATCH_QUERY, rows=rows).consume()
 
     @staticmethod
-    def _ingest_order(tx, order):
+    def _ingest_orders_batch(tx, rows):
         """
-        Ingests a single order, creating the Order node and all its
-        associated relationships, including dedicated Shipment nodes.
+        Ingests a batch of prepared order rows with their customer, sales channel,
+        shipments and line items, then warns about orders of unknown customers and
+        items of unknown variants.
         """
-        sales_channel = order.get("sales_channel", {})
-
-        # Prepare the shipments data by converting the shipping_address map to a JSON string
-        prepared_shipments = []
-        for shipment in order.get("shipments", []):
-            shipment_copy = shipment.copy()
-            if "shipping_address" in shipment_copy:
-                shipment_copy["shipping_address"] = json.dumps(shipment_copy["shipping_address"])
-            prepared_shipments.append(shipment_copy)
-
-        tx.run("""
-                // MERGE the Order node first, as it is the central point
-                MERGE (o:Order {order_id: $order_id})
-                ON CREATE SET
-                    o.order_number = $order_number,
-                    o.status = $status,
-                    o.currency = $currency,
-                    o.notes = $notes,
-                    o.created_at = $created_at,
-                    o.updated_at = $updated_at,
-                    o.order_created_date = $order_created_date,
-                    o.totals = toString($totals),
-                    o.payments = toString($payments),
-                    o.applied_promotions = toString($applied_promotions),
-                    o.external_references = toString($external_references)
-
-                // MERGE the Customer and its relationship to the Order
-                WITH o, $customer_id AS customer_id
-                MERGE (c:Customers {customer_id: customer_id})
-                MERGE (c)-[:PLACED]->(o)
-
-                // Handle Sales Channel (now also representing the BusinessEntity)
-                WITH o, $sales_channel AS sales_channel
-                FOREACH (sc IN CASE WHEN sales_channel.channel_id IS NOT NULL THEN [1] ELSE [] END |
-                    MERGE (salesChannel:SalesChannel {channel_id: sales_channel.channel_id})
-                    ON CREATE SET
-                        salesChannel.name = sales_channel.name,
-                        salesChannel.type = sales_channel.type,
-                        salesChannel.status = sales_channel.status
-                    MERGE (o)-[:PLACED_ON_CHANNEL]->(salesChannel)
-                )
+        tx.run(ORDERS_BATCH_QUERY, rows=rows).consume()
+        result = tx.run(UNKNOWN_CUSTOMERS_QUERY, ids=_distinct(rows, "customer_id"))
+        _warn_unknown("orders", "customers", result.single())
+        result = tx.run(UNKNOWN_VARIANTS_QUERY, ids=_order_variant_ids(rows))
+        _warn_unknown("orders", "variants", result.single())
 
-                // Handle Shipments and their items
-                WITH o, $shipments AS shipments
-                UNWIND shipments AS shipment
-                MERGE (s:Shipment {shipment_id: shipment.shipment_id})
-                ON CREATE SET
-                    s.status = shipment.status,
-                    s.carrier = shipment.carrier,
-                    s.tracking_number = shipment.tracking_number,
-                    s.shipped_date = shipment.shipped_date,
-                    s.estimated_delivery_date = shipment.estimated_delivery_date,
-                    s.shipping_address = shipment.shipping_address
-                MERGE (o)-[:HAS_SHIPMENT]->(s)
-
-                // Link Shipment items to Variants
-                WITH o, s, shipment.items AS items
-                UNWIND items AS item
-                MERGE (v:Variant {variant_id: item.variant_id})
-                MERGE (s)-[r:CONTAINS]->(v)
-                ON CREATE SET
-                    r.quantity = item.quantity
-                // The item_name is removed from the relationship.
-
-                // Handle Order Items (Variants) - this is for all items on the order, not just shipments
-                WITH o, $order_items AS order_items
-                UNWIND order_items AS item
-                MERGE (v_order:Variant {variant_id: item.variant_id})
-                MERGE (o)-[ro:CONTAINS]->(v_order)
-                ON CREATE SET
-                    ro.quantity = item.quantity,
-                    ro.line_item_total = item.line_item_total
-                ON MATCH SET
-                    ro.quantity = item.quantity,
-                    ro.line_item_total = item.line_item_total
-            """,
-               order_id=order["order_id"],
-               order_number=order["order_number"],
-               status=order["status"],
-               currency=order["currency"],
-               notes=order.get("notes", ""),
-               created_at=order["created_at"],
-               updated_at=order["updated_at"],
-               order_created_date=order["order_created_date"],
-               totals=json.dumps(order.get("totals", {})),
-               payments=json.dumps(order.get("payments", [])),
-               applied_promotions=json.dumps(order.get("applied_promotions", [])),
-               external_references=json.dumps(order.get("external_references", [])),
-               customer_id=order["customer_id"],
-               sales_channel=sales_channel,
-               order_items=order["order_items"],
-               shipments=prepared_shipments
-               )
-        print(f"Successfully ingested order: {order['order_number']}")
+    @staticmethod
+    def _ingest_inventories_batch(tx, rows):
+        """
+        Ingests a batch of prepared inventory rows and links each to its Variant,
+        then warns about records of unknown variants.
+        """
+        tx.run(INVENTORIES_BATCH_QUERY, rows=rows).consume()
+        result = tx.run(UNKNOWN_VARIANTS_QUERY, ids=_distinct(rows, "variant_id"))
+        _warn_unknown("inventory records", "variants", result.single())
 
     @staticmethod
-    def _ingest_inventory(tx, inventory):
+    def _ingest_customers_batch(tx, rows):
         """
-        Ingests a single inventory record, creating the Inventory node and its
-        relationship to the Variant node in a single, optimized Cypher query.
+        Ingests a batch of prepared customer rows with their addresses, payment
+        methods and wishlist items, then warns about wishlist items of unknown
+        variants.
         """
-        tx.run("""
-                // MATCH the Variant node that this inventory record is for
-                MATCH (v:Variant {variant_id: $variant_id})
-
-                // MERGE the Inventory node, creating it if it doesn't exist
-                MERGE (inv:Inventory {inventory_id: $inventory_id})
-                ON CREATE SET
-                    inv.created_at = $created_at,
-                    inv.updated_at = $updated_at
-
-                // MERGE the relationship and add properties to it
-                MERGE (inv)-[r:RECORDS_STOCK_FOR]->(v)
-                ON CREATE SET 
-                    r.total = $total, 
-                    r.sellable = $sellable, 
-                    r.reserved = $reserved
-                ON MATCH SET
-                    r.total = $total, 
-                    r.sellable = $sellable, 
-                    r.reserved = $reserved
-                """,
-               inventory_id=inventory["inventory_id"],
-               variant_id=inventory["variant_id"],
-               created_at=inventory["created_at"],
-               updated_at=inventory["updated_at"],
-               total=inventory["quantity"]["total"],
-               sellable=inventory["quantity"]["sellable"],
-               reserved=inventory["quantity"]["reserved"]
-               )
-        print(f"Successfully ingested inventory for variant: {inventory['variant_id']}")
+        tx.run(CUSTOMERS_BATCH_QUERY, rows=rows).consume()
+        result = tx.run(UNKNOWN_VARIANTS_QUERY, ids=_wishlist_variant_ids(rows))
+        _warn_unknown("customers", "variants", result.single())
+
+
+# --- Async Data Ingestion ---
+class AsyncNeo4jDataIngestor:
+    """
+    Async counterpart of Neo4jDataIngestor. Batches are submitted concurrently,
+    each on its own session, so that network latency of one batch overlaps with
+    server-side execution of the others. At most `max_workers` are in flight at
+    once across all stages, like the writer threads of the sync ingestor. The
+    uniqueness constraints are expected to exist already (see
+    Neo4jDataIngestor.ensure_schema).
+    """
+    def __init__(self, driver, database_name, max_workers=MAX_WORKERS):
+        self.driver = driver
+        self.database_name = database_name
+        self.max_workers = max_workers
+
+    async def ingest_data(self, product_data, variants_data, orders_data, customers_data, inventories_data):
+        """Ingests all data, running each stage once the stages it depends on are done"""
+        stages = _ingestion_stages(
+            product_data, variants_data, orders_data, customers_data, inventories_data,
+            BATCH_SIZE, self.max_workers
+        )
+        finished = {}
+        # Shared by the stages that run at the same time (e.g. inventory records and orders)
+        transactions = asyncio.Semaphore(self.max_workers)
+
+        async def run_stage(label, dependencies, tx_name, groups):
+            for dependency in dependencies:
+                # Re-raises the error of a failed dependency, skipping this stage
+                await finished[dependency]
+            await self._write_groups(label, getattr(self, tx_name), groups, transactions)
+
+        for label, dependencies, tx_name, groups in stages:
+            finished[label] = asyncio.create_task(run_stage(label, dependencies, tx_name, groups))
+        await asyncio.gather(*finished.values())
+
+    async def _write_groups(self, label, tx_function, groups, transactions):
+        """
+        Async version of Neo4jDataIngestor._write_groups: groups of batches sharing
+        one managed transaction run as tasks, at most one per partition at a time,
+        and each holds the `transactions` semaphore while its transaction runs.
+        Once a group has failed, no further groups are read or submitted and the
+        ones still running are cancelled; the failures are logged and the first one
+        is raised.
+        """
+        in_flight = {}
+        total = 0
+        failed = False
+
+        async def write_group(tx, group):
+            for size, args in group:
+                logger.debug("Writing batch of %d %s", size, label)
+                await tx_function(tx, *args)
+
+        async def write(group):
+            nonlocal total, failed
+            try:
+                async with transactions, \
+                        self.driver.session(database=self.database_name, fetch_size=-1) as session:
+                    await session.execute_write(write_group, group)
+            except Exception:
+                failed = True
+                raise
+            size = sum(size for size, _ in group)
+            total += size
+            logger.info("Ingested %d %s (total %d)", size, label, total)
+
+        try:
+            for partition, group in groups:
+                # Waiting for the partition's previous group keeps its rows in order
+                if partition in in_flight:
+                    await asyncio.wait([in_flight[partition]])
+                if failed:
+                    break
+                in_flight[partition] = asyncio.create_task(write(group))
+        finally:
+            if failed:
+                for task in in_flight.values():
+                    task.cancel()
+            results = await asyncio.gather(*in_flight.values(), return_exceptions=True)
+        # Cancelled groups end with CancelledError, which is not an Exception
+        _raise_group_errors(label, [r if isinstance(r, Exception) else None for r in results])
 
     @staticmethod
-    def _ingest_customers(tx, customers):
+    async def _ingest_products_batch(tx, batch):
         """
-        Ingests a single customers, creating the Customers node and
-        all its associated nodes and relationships in one query.
+        Async version of Neo4jDataIngestor._ingest_products_batch.
         """
-        # Preprocess wishlist to convert 'price_at_add' from a map to a JSON string
-        prepared_wishlist = []
-        for item in customers.get("wishlist", []):
-            item_copy = item.copy()
-            if "price_at_add" in item_copy and isinstance(item_copy["price_at_add"], dict):
-                item_copy["price_at_add"] = json.dumps(item_copy["price_at_add"])
-            prepared_wishlist.append(item_copy)
-
-        # The rest of the ingestion logic remains the same
-        tx.run("""
-                // MERGE the Customers node first
-                MERGE (c:Customers {customer_id: $customer_id})
-                SET
-                    c.email = $email,
-                    c.first_name = $first_name,
-                    c.last_name = $last_name,
-                    c.phone = $phone,
-                    c.customer_segment = $customer_segment,
-                    c.marketing_consent = $marketing_consent,
-                    c.notes = $notes,
-                    c.status = $status,
-                    c.deleted = $deleted,
-                    c.created_at = $created_at,
-                    c.updated_at = $updated_at,
-                    c.personalization_details = toString($personalization_details)
-
-                // Handle Addresses
-                WITH c, $addresses AS addresses
-                UNWIND addresses AS address
-                MERGE (a:Address {address_id: address.address_id})
-                ON CREATE SET
-                    a.label = address.label,
-                    a.receiver_name = address.receiver_name,
-                    a.receiver_phone = address.receiver_phone,
-                    a.street = address.street,
-                    a.city = address.city,
-                    a.state = address.state,
-                    a.zip_code = address.zip_code,
-                    a.country = address.country
-                MERGE (c)-[rel:HAS_ADDRESS]->(a)
-                ON CREATE SET
-                    rel.is_default = address.is_default
-
-                // Handle Payment Methods
-                WITH c, $payment_methods AS payment_methods
-                UNWIND payment_methods AS method
-                MERGE (p:PaymentMethod {payment_method_id: method.payment_method_id})
-                ON CREATE SET
-                    p.type = method.type,
-                    p.gateway_token = method.gateway_token,
-                    p.card_last_four = method.card_last_four,
-                    p.card_brand = method.card_brand,
-                    p.card_expiry_month = method.card_expiry_month,
-                    p.card_expiry_year = method.card_expiry_year
-                MERGE (c)-[rel:HAS_PAYMENT_METHOD]->(p)
-                ON CREATE SET
-                    rel.is_default = method.is_default
-
-                // Handle Wishlist Items
-                WITH c, $wishlist AS wishlist
-                UNWIND wishlist AS item
-                MERGE (v:Variant {variant_id: item.variant_id})
-                MERGE (c)-[w:WISHES_FOR]->(v)
-                ON CREATE SET
-                    w.added_at = item.added_at,
-                    w.price_at_add = item.price_at_add // This is now a JSON string
-                """,
-               customer_id=customers["customer_id"],
-               email=customers["email"],
-               first_name=customers["first_name"],
-               last_name=customers["last_name"],
-               phone=customers["phone"],
-               customer_segment=customers["customer_segment"],
-               marketing_consent=customers["marketing_consent"],
-               notes=customers["notes"],
-               status=customers["status"],
-               deleted=customers["deleted"],
-               created_at=customers["created_at"],
-               updated_at=customers["updated_at"],
-               personalization_details=json.dumps(customers.get("personalization_details", {})),
-               addresses=customers.get("addresses", []),
-               payment_methods=customers.get("payment_methods", []),
-               wishlist=prepared_wishlist  # Pass the prepared list
-               )
-        print(f"Successfully ingested customer: {customers['email']}")
+        result = await tx.run(
+            PRODUCT_DIMENSIONS_QUERY,
+            categories=batch["categories"],
+            collections=batch["collections"],
+            partners=batch["partners"],
+            brands=batch["brands"]
+        )
+        await result.consume()
+        result = await tx.run(PRODUCTS_BATCH_QUERY, rows=batch["rows"])
+        await result.consume()
+
+    @staticmethod
+    async def _ingest_variants_batch(tx, rows):
+        """Async version of Neo4jDataIngestor._ingest_variants_batch."""
+        result = await tx.run(VARIANTS_BATCH_QUERY, rows=rows)
+        await result.consume()
+
+    @staticmethod
+    async def _ingest_orders_batch(tx, rows):
+        """Async version of Neo4jDataIngestor._ingest_orders_batch."""
+        result = await tx.run(ORDERS_BATCH_QUERY, rows=rows)
+        await result.consume()
+        result = await tx.run(UNKNOWN_CUSTOMERS_QUERY, ids=_distinct(rows, "customer_id"))
+        _warn_unknown("orders", "customers", await result.single())
+        result = await tx.run(UNKNOWN_VARIANTS_QUERY, ids=_order_variant_ids(rows))
+        _warn_unknown("orders", "variants", await result.single())
+
+    @staticmethod
+    async def _ingest_inventories_batch(tx, rows):
+        """Async version of Neo4jDataIngestor._ingest_inventories_batch."""
+        result = await tx.run(INVENTORIES_BATCH_QUERY, rows=rows)
+        await result.consume()
+        result = await tx.run(UNKNOWN_VARIANTS_QUERY, ids=_distinct(rows, "variant_id"))
+        _warn_unknown("inventory records", "variants", await result.single())
+
+    @staticmethod
+    async def _ingest_customers_batch(tx, rows):
+        """Async version of Neo4jDataIngestor._ingest_customers_batch."""
+        result = await tx.run(CUSTOMERS_BATCH_QUERY, rows=rows)
+        await result.consume()
+        result = await tx.run(UNKNOWN_VARIANTS_QUERY, ids=_wishlist_variant_ids(rows))
+        _warn_unknown("customers", "variants", await result.single())
+
+
+async def ingest_data_async(uri, user, password, database_name,
+                            product_data, variants_data, orders_data, customers_data, inventories_data):
+    """
+    Opens an async driver, ingests all data concurrently and closes the driver.
+    """
+    async with neo4j.AsyncGraphDatabase.driver(uri, auth=(user, password), **DRIVER_CONFIG) as driver:
+        await AsyncNeo4jDataIngestor(driver, database_name).ingest_data(
+            product_data, variants_data, orders_data, customers_data, inventories_data
+        )
+
+
+# --- Offline Bulk Import ---
+def _csv_value(value):
+    """Formats a property value for the neo4j-admin CSV importer."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, list):
+        return ";".join(str(item) for item in value)
+    return value
+
+
+def _csv_header(key, types):
+    """
+    Builds a neo4j-admin CSV header entry for a property, typed after the types of
+    all its non-null values: integers are stored as longs like on the online path,
+    and a column mixing integers and floats as doubles. Any other mix, or a column
+    that is always null, is left a string.
+    """
+    if types == {bool}:
+        return f"{key}:boolean"
+    if types == {int}:
+        return f"{key}:long"
+    if types and types <= {int, float}:
+        return f"{key}:double"
+    if types == {list}:
+        return f"{key}:string[]"
+    return key
+
+
+def _write_nodes_csv(path, id_header, nodes):
+    """
+    Writes `(id, props)` pairs as a neo4j-admin node CSV file. The nodes are spilled
+    to a temporary JSON lines file while the property types are collected, so the
+    header covers every property of every node and the input is still streamed once.
+    """
+    types = {}
+    with tempfile.TemporaryFile("w+") as spill:
+        for node_id, props in nodes:
+            for key, value in props.items():
+                key_types = types.setdefault(key, set())
+                if value is not None:
+                    key_types.add(type(value))
+            spill.write(_json_dumps([node_id, props]) + "\n")
+
+        spill.seek(0)
+        columns = list(types)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow([id_header] + [_csv_header(key, types[key]) for key in columns])
+            for line in spill:
+                node_id, props = json.loads(line)
+                writer.writerow([node_id] + [_csv_value(props.get(key)) for key in columns])
+
+
+def write_product_import_csvs(product_data, directory):
+    """
+    Writes products and their categories, collections, partners and brands as CSV
+    files in the header format of `neo4j-admin database import`, streaming the
+    products once. Returns the --nodes/--relationships arguments for the importer.
+    """
+    categories, collections, partners, brands = {}, {}, {}, {}
+    rel_files = {
+        name: open(os.path.join(directory, f"rels.{name}.csv"), "w", newline="")
+        for name in ("product_category", "product_collection", "product_partner", "product_brand")
+    }
+    rel_writers = {name: csv.writer(f) for name, f in rel_files.items()}
+    rel_writers["product_category"].writerow([":START_ID(Product)", ":END_ID(Category)"])
+    rel_writers["product_collection"].writerow([":START_ID(Product)", ":END_ID(Collection)"])
+    rel_writers["product_partner"].writerow([":START_ID(Product)", ":END_ID(Partner)"])
+    rel_writers["product_brand"].writerow([":START_ID(Product)", ":END_ID(Brand)"])
+
+    try:
+        products = _valid_rows(_product_row, _dedupe(product_data, ("product_id",), "products"),
+                               "products", "product_id")
+
+        def product_nodes():
+            for product, row in products:
+                yield row["product_id"], row["props"]
+
+                for category in product.get("categories") or []:
+                    categories.setdefault(category["category_id"], category)
+                    rel_writers["product_category"].writerow([row["product_id"], category["category_id"]])
+                for collection in product.get("collections") or []:
+                    collections.setdefault(collection["collection_id"], collection)
+                    rel_writers["product_collection"].writerow([row["product_id"], collection["collection_id"]])
+                for partner in product.get("partners") or []:
+                    partners.setdefault(partner["partner_id"], partner)
+                    rel_writers["product_partner"].writerow([row["product_id"], partner["partner_id"]])
+                if row["brand_id"] is not None:
+                    brands.setdefault(row["brand_id"], product.get("brand"))
+                    rel_writers["product_brand"].writerow([row["product_id"], row["brand_id"]])
+
+        _write_nodes_csv(os.path.join(directory, "nodes.products.csv"), "product_id:ID(Product)", product_nodes())
+    finally:
+        for f in rel_files.values():
+            f.close()
+
+    dimensions = (
+        ("Category", "categories", categories, ["category_id:ID(Category)", "name", "slug"],
+         lambda c: [c["category_id"], c.get("name"), c.get("slug")]),
+        ("Collection", "collections", collections, ["collection_id:ID(Collection)", "name", "slug"],
+         lambda c: [c["collection_id"], c.get("name"), c.get("slug")]),
+        ("Partner", "partners", partners, ["partner_id:ID(Partner)", "name", "type"],
+         lambda p: [p["partner_id"], p.get("name"), p.get("type")]),
+        ("Brand", "brands", brands, ["brand_id:ID(Brand)", "name"],
+         lambda b: [b["id"], b.get("name")]),
+    )
+    args = [f"--nodes=Product={os.path.join(directory, 'nodes.products.csv')}"]
+    for label, name, entities, header, to_row in dimensions:
+        path = os.path.join(directory, f"nodes.{name}.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows([_csv_value(v) for v in to_row(entity)] for entity in entities.values())
+        args.append(f"--nodes={label}={path}")
+
+    args += [
+        f"--relationships=BELONGS_TO={os.path.join(directory, 'rels.product_category.csv')}",
+        f"--relationships=PART_OF={os.path.join(directory, 'rels.product_collection.csv')}",
+        f"--relationships=SUPPLIED_BY={os.path.join(directory, 'rels.product_partner.csv')}",
+        f"--relationships=BELONGS_TO={os.path.join(directory, 'rels.product_brand.csv')}",
+    ]
+    return args
+
+
+def write_variant_import_csvs(variant_data, directory):
+    """
+    Writes the variants and their HAS relationships from the products as CSV files
+    for `neo4j-admin database import`, streaming the variants once. Returns the
+    --nodes/--relationships arguments for the importer.
+    """
+    nodes_path = os.path.join(directory, "nodes.variants.csv")
+    rels_path = os.path.join(directory, "rels.product_variant.csv")
+    with open(rels_path, "w", newline="") as rels_f:
+        rels_writer = csv.writer(rels_f)
+        rels_writer.writerow([":START_ID(Product)", ":END_ID(Variant)"])
+        variants = _valid_rows(_variant_row, _dedupe(variant_data, ("variant_id", "product_id"), "variants"),
+                               "variants", "variant_id")
+
+        def variant_nodes():
+            for _, row in variants:
+                yield row["variant_id"], row["props"]
+                rels_writer.writerow([row["product_id"], row["variant_id"]])
+
+        _write_nodes_csv(nodes_path, "variant_id:ID(Variant)", variant_nodes())
+
+    return [f"--nodes=Variant={nodes_path}", f"--relationships=HAS={rels_path}"]
+
+
+def bulk_import_catalog(database_name, product_data, variant_data, directory=None):
+    """
+    Loads the product catalog (products, their related nodes and their variants)
+    into a database that does not exist yet with the offline `neo4j-admin database
+    import full` tool, which writes the store files directly and skips transactions
+    entirely. It must run on the Neo4j host, before CREATE DATABASE. Returns True
+    on success; on failure the caller falls back to the online MERGE path.
+    """
+    directory = directory or tempfile.mkdtemp(prefix="neo4j-import-")
+    try:
+        args = write_product_import_csvs(product_data, directory)
+        args += write_variant_import_csvs(variant_data, directory)
+        # Variants of unknown products are skipped, like the MATCH of the online path
+        subprocess.run(
+            [NEO4J_ADMIN, "database", "import", "full", database_name,
+             "--skip-duplicate-nodes=true", "--skip-bad-relationships=true",
+             "--multiline-fields=true", *args],
+            check=True
+        )
+        print(f"Bulk import of the catalog into '{database_name}' complete (CSV files in {directory}).")
+        return True
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Bulk import failed: {e}. Falling back to online ingestion.")
+        return False
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest the Ekyam JSON exports into Neo4j.")
+    parser.add_argument(
+        "--offline-bootstrap", action="store_true",
+        help="when the database does not exist yet, load the catalog with neo4j-admin import (or NEO4J_BULK_LOAD=1)"
+    )
+    parser.add_argument(
+        "--initial-load", action="store_true",
+        help="first import into an empty database: let the server commit with CALL ... IN TRANSACTIONS"
+    )
+    parser.add_argument(
+        "--verbose", action="store_true",
+        help="log every batch written by this module"
+    )
+    args = parser.parse_args()
+    if args.initial_load and ASYNC_INGEST:
+        # The async ingestor only writes through managed transactions
+        parser.error("--initial-load cannot be combined with NEO4J_ASYNC_INGEST=1")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    if args.verbose:
+        # Only this module's logger: the driver's DEBUG log includes every query's parameters
+        logger.setLevel(logging.DEBUG)
+
     # Corrected database name
     db_name = "knowledge-graph"
-    # Use "system" for administrative tasks
-    system_db_name = "system"
-    # Replace with your actual Neo4j URI, user, and password
-    neo4j_uri = "neo4j://127.0.0.1:7687"
+    # Replace with your actual Neo4j URI, user, and password. A single local instance
+    # needs no routing table, so the direct bolt:// scheme is the default; set
+    # NEO4J_URI=neo4j://... when loading into a cluster
+    neo4j_uri = os.getenv("NEO4J_URI", "bolt://127.0.0.1:7687")
     neo4j_user = "neo4j"
     # Load the password from the environment variable
     neo4j_password = os.getenv("NEO4J_PASSWORD")
@@ -438,45 +1500,64 @@ if __name__ == "__main__":
         print("Error: NEO4J_PASSWORD not found in .env file. Please check your setup.")
         exit()
 
-    print("--- STEP 1: Connecting to the 'system' database to create the new database ---")
+    print("--- STEP 1: Connecting to Neo4j and creating the new database ---")
+    # A single driver (and its connection pool) is reused by the admin and ingestion phases
+    driver = connect_to_neo4j(neo4j_uri, neo4j_user, neo4j_password)
+    if not driver:
+        print("Error: Could not connect to Neo4j. Please check your setup.")
+        exit()
+
+    # On a cold start the product catalog can be bulk loaded offline, before the database exists
+    catalog_bulk_loaded = False
+    if (args.offline_bootstrap or BULK_LOAD) and not database_exists(driver, db_name):
+        print("\n--- Bulk importing the product catalog with neo4j-admin ---")
+        try:
+            catalog_bulk_loaded = bulk_import_catalog(
+                db_name,
+                iter_json_array('ekyam_chat_v3.products.json'),
+                iter_json_array('ekyam_chat_v3.variants.json')
+            )
+        except FileNotFoundError as e:
+            print(f"Error: {e}. Bulk import skipped.")
+
     # create db if it does not exist
-    system_driver = connect_to_neo4j(neo4j_uri, neo4j_user, neo4j_password, database_name=system_db_name)
-    if system_driver:
-        create_database(system_driver, db_name)
-        system_driver.close()
-
-    print("\n--- STEP 2: Connecting to the newly created 'knowledge-graph' database to run queries ---")
-    data_driver = None
-    max_retries = 5
-    for attempt in range(max_retries):
-        print(f"Attempting to connect to '{db_name}' database... (Attempt {attempt + 1}/{max_retries})")
-        data_driver = connect_to_neo4j(neo4j_uri, neo4j_user, neo4j_password, database_name=db_name)
-        if data_driver:
-            # Initialize data variables outside the try...except block
-            products_data = []
-            variants_data = []
-            orders_data = []
-            inventories_data = []
-            customers_data = []
-            try:
-                with open('ekyam_chat_v3.products.json', 'r') as f:
-                    products_data = json.load(f)
-                with open('ekyam_chat_v3.variants.json', 'r') as f:
-                    variants_data = json.load(f)
-                with open('ekyam_chat_v3.orders.json', 'r') as f:
-                    orders_data = json.load(f)
-                with open('ekyam_chat_v3.inventories.json', 'r') as f:
-                    inventories_data = json.load(f)
-                with open('ekyam_chat_v3.customers.json', 'r') as f:
-                    customers_data = json.load(f)
-            except FileNotFoundError as e:
-                print(f"Error: {e}. Please ensure all JSON files exist.")
+    create_database(driver, db_name)
 
+    print("\n--- STEP 2: Waiting for the newly created 'knowledge-graph' database to run queries ---")
+    database_ready = wait_for_database(driver, db_name)
 
+    if database_ready:
+        # The catalog is not ingested again when it was bulk loaded
+        products_data = []
+        variants_data = []
+        try:
+            # Every file is streamed from disk and consumed batch by batch during ingestion
+            if not catalog_bulk_loaded:
+                products_data = iter_json_array('ekyam_chat_v3.products.json')
+                variants_data = iter_json_array('ekyam_chat_v3.variants.json')
+            orders_data = iter_json_array('ekyam_chat_v3.orders.json')
+            inventories_data = iter_json_array('ekyam_chat_v3.inventories.json')
+            customers_data = iter_json_array('ekyam_chat_v3.customers.json')
+        except FileNotFoundError as e:
+            print(f"Error: {e}. Please ensure all JSON files exist. Ingestion skipped.")
+        else:
             # Call the ingestion function once with all the data
-            if products_data or variants_data or orders_data or inventories_data or customers_data:
-                print("\n--- Starting data ingestion from JSON files ---")
-                ingestor = Neo4jDataIngestor(data_driver, db_name)
+            print("\n--- Starting data ingestion from JSON files ---")
+            ingestor = Neo4jDataIngestor(driver, db_name, initial_load=args.initial_load)
+            if ASYNC_INGEST:
+                # The batches go through the async driver; the constraints and query
+                # plans are still prepared through the sync one, before the first MERGE
+                ingestor.ensure_schema()
+                ingestor.warm_up_queries()
+                asyncio.run(ingest_data_async(
+                    neo4j_uri, neo4j_user, neo4j_password, db_name,
+                    products_data,
+                    variants_data,
+                    orders_data,
+                    customers_data,
+                    inventories_data
+                ))
+            else:
                 ingestor.ingest_data(
                     products_data,
                     variants_data,
@@ -484,14 +1565,7 @@ if __name__ == "__main__":
                     customers_data,
                     inventories_data
                 )
-                print("--- Data ingestion complete ---")
-            else:
-                print("No data found in any JSON files. Ingestion skipped.")
-
-            data_driver.close()
-            break  # Break the retry loop on successful connection and ingestion
-        else:
-            print("Connection failed. The database may not be ready yet. Retrying in 5 seconds...")
-            time.sleep(5)
+            print("--- Data ingestion complete ---")
 
-    print("\nAzll driver connections closed.")
\ No newline at end of file
+    driver.close()
+    print("\nAll driver connections closed.")